@@ -1,12 +1,20 @@
 # %%
 import logging
+import logging.handlers
+import queue
+import atexit
 import datetime
 import sys
 import os
-import boto3
+import csv
+import json
+import copy
+import functools
+import concurrent.futures
+from collections import Counter, namedtuple
 import time
+import random
 import yaml
-import pandas as pd
 
 # %%
 # Basic defaults
@@ -16,9 +24,146 @@ config_yaml_path = 'config.yml'
 test_queries_path = 'test_queries'
 log_path = 'logs'
 csv_path = 'run_details'
+run_details_columns = [
+    'CreatedAt',
+    'Duration',
+    'HasResultSet',
+    'Id',
+    'QueryString',
+    'RedshiftQueryId',
+    'ResultRows',
+    'ResultSize',
+    'Status',
+    'UpdatedAt',
+    'Error'
+]
 show_recs = 3
 status_failed = 'FAILED'
 status_finished = 'FINISHED'
+terminal_statuses = frozenset((status_failed, status_finished))
+
+# Use libyaml backed loader when available, else pure Python loader
+yaml_loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+# %%
+# Run configuration param checks
+ParamCheck = namedtuple(
+    'ParamCheck',
+    [
+        'param',
+        'mandatory',
+        'data_type',
+        'fixed_value',
+        'num_lower',
+        'num_upper',
+        'default_value'
+    ]
+)
+
+param_checks = (
+    ParamCheck(
+        param='clusterid_or_workgroupname',
+        mandatory=True,
+        data_type=str,
+        fixed_value=None,
+        num_lower=None,
+        num_upper=None,
+        default_value=None
+    ),
+    ParamCheck(
+        param='type',
+        mandatory=True,
+        data_type=str,
+        fixed_value=[
+            'provisioned',
+            'serverless'
+        ],
+        num_lower=None,
+        num_upper=None,
+        default_value=None
+    ),
+    ParamCheck(
+        param='dbname',
+        mandatory=True,
+        data_type=str,
+        fixed_value=None,
+        num_lower=None,
+        num_upper=None,
+        default_value=None
+    ),
+    ParamCheck(
+        param='secret_arn',
+        mandatory=True,
+        data_type=str,
+        fixed_value=None,
+        num_lower=None,
+        num_upper=None,
+        default_value=None
+    ),
+    ParamCheck(
+        param='attempts',
+        mandatory=False,
+        data_type=int,
+        fixed_value=None,
+        num_lower=1,
+        num_upper=200,
+        default_value=1
+    ),
+    ParamCheck(
+        param='wait_cycles',
+        mandatory=False,
+        data_type=int,
+        fixed_value=None,
+        num_lower=1,
+        num_upper=None,
+        default_value=5
+    ),
+    ParamCheck(
+        param='sleep_time',
+        mandatory=False,
+        data_type=int,
+        fixed_value=None,
+        num_lower=1,
+        num_upper=None,
+        default_value=5
+    ),
+    ParamCheck(
+        param='synchronous',
+        mandatory=False,
+        data_type=bool,
+        fixed_value=None,
+        num_lower=None,
+        num_upper=None,
+        default_value=True
+    ),
+    ParamCheck(
+        param='silent',
+        mandatory=False,
+        data_type=bool,
+        fixed_value=None,
+        num_lower=None,
+        num_upper=None,
+        default_value=True
+    ),
+    ParamCheck(
+        param='resultcache',
+        mandatory=False,
+        data_type=bool,
+        fixed_value=None,
+        num_lower=None,
+        num_upper=None,
+        default_value=False
+    ),
+    ParamCheck(
+        param='mvrewrite',
+        mandatory=False,
+        data_type=bool,
+        fixed_value=None,
+        num_lower=None,
+        num_upper=None,
+        default_value=False
+    )
+)
 
 # %%
 # Set working directory
@@ -32,13 +177,75 @@ log_formatter = logging.Formatter(
 file_handler = logging.FileHandler(os.path.join(log_path, f'{now}.log'))
 file_handler.setFormatter(log_formatter)
 
+# Buffer file writes, flushed every 1000 records, on error or on exit
+buffered_file_handler = logging.handlers.MemoryHandler(
+    capacity=1000, flushLevel=logging.ERROR, target=file_handler)
+
 console_handler = logging.StreamHandler(sys.stdout)
 console_handler.setFormatter(log_formatter)
 
+# Write logs from a background thread so logging does not block polling
+log_queue = queue.Queue(-1)
+
+log_listener = logging.handlers.QueueListener(
+    log_queue, buffered_file_handler, console_handler, respect_handler_level=True)
+log_listener.start()
+atexit.register(log_listener.stop)
+
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
-logger.addHandler(file_handler)
-logger.addHandler(console_handler)
+logger.addHandler(logging.handlers.QueueHandler(log_queue))
+
+# %%
+@functools.lru_cache(maxsize=100)
+def load_yaml_cached(file_path, mtime, size):
+    '''
+    Parse yaml file, cached by path, modified time and size
+
+    Flow
+    1. If json sidecar was saved from this yaml file's modified time and size, read json sidecar
+    2. Else read and parse yaml file
+       - Save json sidecar with modified time and size for next runs, if content is json compatible
+    '''
+
+    json_path = f'{file_path}.json'
+
+    # If json sidecar was saved from this yaml file's modified time and size, read json sidecar
+    try:
+        with open(json_path, 'r') as stream:
+            sidecar = json.load(stream)
+        if sidecar['mtime'] == mtime and sidecar['size'] == size:
+            return sidecar['content']
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+
+    with open(file_path, 'r') as stream:
+        result = yaml.load(stream, Loader=yaml_loader)
+
+    # Save json sidecar with modified time and size for next runs, if content is json compatible
+    try:
+        if json.loads(json.dumps(result)) == result:
+            with open(f'{json_path}.tmp', 'w') as stream:
+                json.dump({'mtime': mtime, 'size': size, 'content': result}, stream)
+            os.replace(f'{json_path}.tmp', json_path)
+    except (OSError, TypeError, ValueError):
+        pass
+
+    return result
+
+# %%
+def load_yaml(file_path):
+    '''
+    Read yaml file, reusing previous parse if file is unchanged
+
+    Flow
+    1. Get file modified time and size
+    2. Get cached parse and return a copy, so callers can modify it
+    '''
+
+    st = os.stat(file_path)
+
+    return copy.deepcopy(load_yaml_cached(file_path, st.st_mtime, st.st_size))
 
 # %%
 def read_args():
@@ -81,11 +288,11 @@ def read_config(target):
     Flow
     1. Read all configurations
     2. Filter for configuration specified by args target
-    3. Validation
-       - Mandatory params
-       - Valid data type
-       - Valid values
-    4. Apply default values for optional params
+    3. For each param in a single pass
+       - Validate mandatory params
+       - Validate data type
+       - Validate valid values
+       - Apply default values for optional params
     '''
 
     logger.info('Check run configurations')
@@ -93,155 +300,56 @@ def read_config(target):
     result = None
     err = None
 
-    param_checks = {
-        'clusterid_or_workgroupname': {
-            'mandatory': True,
-            'data_type': str,
-            'fixed_value': None,
-            'num_lower': None,
-            'num_upper': None,
-            'default_value': None
-        },
-        'type': {
-            'mandatory': True,
-            'data_type': str,
-            'fixed_value': [
-                'provisioned',
-                'serverless'
-            ],
-            'num_lower': None,
-            'num_upper': None,
-            'default_value': None
-        },
-        'dbname': {
-            'mandatory': True,
-            'data_type': str,
-            'fixed_value': None,
-            'num_lower': None,
-            'num_upper': None,
-            'default_value': None
-        },
-        'secret_arn': {
-            'mandatory': True,
-            'data_type': str,
-            'fixed_value': None,
-            'num_lower': None,
-            'num_upper': None,
-            'default_value': None
-        },
-        'attempts': {
-            'mandatory': False,
-            'data_type': int,
-            'fixed_value': None,
-            'num_lower': 1,
-            'num_upper': 200,
-            'default_value': 1
-        },
-        'wait_cycles': {
-            'mandatory': False,
-            'data_type': int,
-            'fixed_value': None,
-            'num_lower': 1,
-            'num_upper': None,
-            'default_value': 5
-        },
-        'sleep_time': {
-            'mandatory': False,
-            'data_type': int,
-            'fixed_value': None,
-            'num_lower': 1,
-            'num_upper': None,
-            'default_value': 5
-        },
-        'synchronous': {
-            'mandatory': False,
-            'data_type': bool,
-            'fixed_value': None,
-            'num_lower': None,
-            'num_upper': None,
-            'default_value': True
-        },
-        'silent': {
-            'mandatory': False,
-            'data_type': bool,
-            'fixed_value': None,
-            'num_lower': None,
-            'num_upper': None,
-            'default_value': True
-        },
-        'resultcache': {
-            'mandatory': False,
-            'data_type': bool,
-            'fixed_value': None,
-            'num_lower': None,
-            'num_upper': None,
-            'default_value': False
-        },
-        'mvrewrite': {
-            'mandatory': False,
-            'data_type': bool,
-            'fixed_value': None,
-            'num_lower': None,
-            'num_upper': None,
-            'default_value': False
-        }
-    }
-
     # Read all configurations
     if err is None:
         try:
-            with open(config_yaml_path, 'r') as stream:
-                result = yaml.safe_load(stream)
+            result = load_yaml(config_yaml_path)
         except Exception as e:
             err = f'{e} while reading {config_yaml_path}'
 
     # Filter for configuration specified by args target
     if err is None:
-        if target in result.keys():
+        if target in result:
             result = result[target]
         else:
             err = f'Missing target {target} in {config_yaml_path}'
 
-    # Validate mandatory params
+    # Validate params and apply default values for optional params
     if err is None:
-        for param, details in param_checks.items():
-            if param not in result.keys() and details['mandatory']:
-                err = f'Missing mandatory param {param} in {config_yaml_path}'
-                break
+        for details in param_checks:
 
-    # Validate data types
-    if err is None:
-        for param, details in param_checks.items():
-            if param in result.keys() and not isinstance(result[param], details['data_type']):
-                err = f'Missing valid data type {details["data_type"]} for {param} in {config_yaml_path}'
-                break
+            param = details.param
 
-    # Validate valid values
-    if err is None:
-        for param, details in param_checks.items():
-            if param in result.keys() and details['fixed_value'] is not None and result[param] not in details['fixed_value']:
-                err = f'Missing valid values {details["fixed_value"]} for {param} in {config_yaml_path}'
+            # Validate mandatory params and apply default values for optional params
+            if param not in result:
+                if details.mandatory:
+                    err = f'Missing mandatory param {param} in {config_yaml_path}'
+                    break
+                if details.default_value is not None:
+                    result[param] = details.default_value
+                continue
+
+            value = result[param]
+
+            # Validate data types, exact type so bool is not accepted as int
+            if type(value) is not details.data_type:
+                err = f'Missing valid data type {details.data_type} for {param} in {config_yaml_path}'
                 break
 
-    # Validate min numeric value
-    if err is None:
-        for param, details in param_checks.items():
-            if param in result.keys() and details['num_lower'] is not None and result[param] < details['num_lower']:
-                err = f'Missing greater than or equal to {details["num_lower"]} value for {param} in {config_yaml_path}'
+            # Validate valid values
+            if details.fixed_value is not None and value not in details.fixed_value:
+                err = f'Missing valid values {details.fixed_value} for {param} in {config_yaml_path}'
                 break
 
-    # Validate max numeric value
-    if err is None:
-        for param, details in param_checks.items():
-            if param in result.keys() and details['num_upper'] is not None and result[param] > details['num_upper']:
-                err = f'Missing lesser than or equal to {details["num_upper"]} value for {param} in {config_yaml_path}'
+            # Validate min numeric value
+            if details.num_lower is not None and value < details.num_lower:
+                err = f'Missing greater than or equal to {details.num_lower} value for {param} in {config_yaml_path}'
                 break
 
-    # Apply default values for optional params
-    if err is None:
-        for param, details in param_checks.items():
-            if param not in result.keys() and details['default_value'] is not None:
-                result[param] = details['default_value']
+            # Validate max numeric value
+            if details.num_upper is not None and value > details.num_upper:
+                err = f'Missing lesser than or equal to {details.num_upper} value for {param} in {config_yaml_path}'
+                break
 
     # Log run configurations or error
     if err is None:
@@ -278,8 +386,7 @@ def read_queries(file_name):
     # Read all queries specified by args file_name
     if err is None:
         try:
-            with open(file_path, 'r') as stream:
-                result = yaml.safe_load(stream)
+            result = load_yaml(file_path)
         except Exception as e:
             err = f'{e} while reading {file_path}'
 
@@ -362,14 +469,13 @@ def read_queries(file_name):
     return result
 
 # %%
-def batch_test_queries(run_config, first_level_item):
+def session_setting_queries(run_config):
     '''
-    Batch related test queries together
+    Build session setting queries prefixed to every batch
 
     Flow
     1. Prefix enable_result_cache_for_session on/off
     2. Prefix mv_enable_aqmv_for_session on/off
-    3. Add test queries
     '''
 
     result = []
@@ -386,15 +492,30 @@ def batch_test_queries(run_config, first_level_item):
     else:
         result += ['set mv_enable_aqmv_for_session to off;']
 
+    return result
+
+# %%
+def batch_test_queries(session_settings, first_level_item):
+    '''
+    Batch related test queries together
+
+    Flow
+    1. Prefix session setting queries
+    2. Add test queries
+    '''
+
+    # Prefix session setting queries
+    result = list(session_settings)
+
     # Add test queries
     if isinstance(first_level_item, list):
         result += first_level_item
     else:
         result += [first_level_item]
 
-    # Log each test query in batch
-    for each_query in result:
-        logger.info(f'- {each_query.strip()}')
+    # Log all test queries in batch as a single record
+    logger.info(
+        '\n' + '\n'.join(f'- {each_query.strip()}' for each_query in result))
 
     return result
 
@@ -455,6 +576,24 @@ def run_describe_statement(redshift_data_api_client, data_api_id):
 
     return result
 
+# %%
+def poll_sleep(run_config, poll):
+    '''
+    Sleep between polls with exponential backoff capped at sleep_time
+
+    Flow
+    1. Sleep 0.1 s doubled on each poll, capped at sleep_time
+    2. Add up to 0.05 s jitter so attempts are not polled in lockstep
+    3. Return wait cycles elapsed, as a fraction of sleep_time
+    '''
+
+    # Exponent is capped so long runs cannot overflow float conversion
+    seconds = min(run_config['sleep_time'], 0.1 * 2 ** min(poll, 32))
+
+    time.sleep(seconds + random.uniform(0, 0.05))
+
+    return seconds / run_config['sleep_time']
+
 # %%
 def run_sync_attempts(redshift_data_api_client, run_config, query):
     '''
@@ -487,41 +626,47 @@ def run_sync_attempts(redshift_data_api_client, run_config, query):
             continue
 
         # Poll until query status is FAILED or FINISHED or wait_cycles reached
+        attempt_status = None
+        prev_status = None
         wait_cycle = 0
+        poll = 0
 
-        while wait_cycle < run_config['wait_cycles']:
+        while attempt_status not in terminal_statuses and wait_cycle < run_config['wait_cycles']:
 
             result[attempt] = run_describe_statement(
                 redshift_data_api_client, result[attempt]['Id'])
 
             attempt_status = result[attempt]['Status']
-            attempt_duration = result[attempt]['Duration']
-            attempt_has_result = result[attempt]['HasResultSet']
-
-            status_msg = f'- {attempt}, {attempt_status}, {round(attempt_duration, 4):.4f} s'
 
-            if not run_config['silent']:
+            # Log details only when status changes
+            if not run_config['silent'] and attempt_status != prev_status:
                 logger.info(f'- {result[attempt]}')
 
-            # If FAILED, log error
-            if attempt_status == status_failed:
-                logger.info(
-                    f'{status_msg}, {result[attempt]["Error"]}')
-                break
+            prev_status = attempt_status
 
-            # If FINISHED, get results/records and log success
-            if attempt_status == status_finished:
-                if attempt_has_result:
-                    logger.info(f'{status_msg}, Has result')
-                else:
-                    logger.info(f'{status_msg}, No result')
-                break
+            # Sleep before next poll only if status is not FAILED or FINISHED
+            if attempt_status not in terminal_statuses:
+                wait_cycle += poll_sleep(run_config, poll)
+                poll += 1
+
+        attempt_duration = result[attempt]['Duration']
+        attempt_has_result = result[attempt]['HasResultSet']
 
-            time.sleep(run_config['sleep_time'])
-            wait_cycle += 1
+        status_msg = f'- {attempt}, {attempt_status}, {round(attempt_duration, 4):.4f} s'
+
+        # If FAILED, log error
+        if attempt_status == status_failed:
+            logger.info(f'{status_msg}, {result[attempt]["Error"]}')
+
+        # If FINISHED, log success
+        elif attempt_status == status_finished:
+            if attempt_has_result:
+                logger.info(f'{status_msg}, Has result')
+            else:
+                logger.info(f'{status_msg}, No result')
 
         # If wait_cycles reached, log timeout
-        if wait_cycle >= run_config['wait_cycles']:
+        else:
             logger.info(f'{status_msg}, wait_cycles limit reached')
 
         attempt += 1
@@ -529,7 +674,7 @@ def run_sync_attempts(redshift_data_api_client, run_config, query):
     return result
 
 # %%
-def run_async_attempts(redshift_data_api_client, run_config, query):
+def run_async_attempts(redshift_data_api_client, executor, run_config, query):
     '''
     Asynchronously run all attempts
 
@@ -539,6 +684,7 @@ def run_async_attempts(redshift_data_api_client, run_config, query):
        - Move to next attempt
     2. For all sent attempts
        - Poll until all queries status are FAILED or FINISHED or wait_cycles reached
+       - Poll pending attempts concurrently using executor
     3. For all sent attempts
        - If FAILED, log error
        - If FINISHED, log success
@@ -567,48 +713,72 @@ def run_async_attempts(redshift_data_api_client, run_config, query):
 
     # Poll until all queries status are FAILED or FINISHED or wait_cycles reached
     wait_cycle = 0
+    poll = 0
+
+    # Attempts already FAILED or FINISHED are not polled again
+    done = set()
+    n_done = 0
+    n_total = sum(1 for v in result.values() if v is not None)
+
+    # Count of attempts per status, updated only when an attempt changes status
+    cnt_status = Counter()
 
     while wait_cycle < run_config['wait_cycles']:
 
-        for attempt in result.keys():
+        # Get status of all pending attempts concurrently
+        futures = {
+            executor.submit(
+                run_describe_statement, redshift_data_api_client, result[attempt]['Id']): attempt
+            for attempt in result.keys()
+            if attempt not in done and result[attempt] is not None
+        }
 
-            if result[attempt] is not None and result[attempt].get('Status') not in [status_failed, status_finished]:
+        for future in concurrent.futures.as_completed(futures):
 
-                result[attempt] = run_describe_statement(
-                    redshift_data_api_client, result[attempt]['Id'])
+            attempt = futures[future]
+            prev_status = result[attempt].get('Status')
+            describe_result = future.result()
 
-                attempt_status = result[attempt]['Status']
-                attempt_has_result = result[attempt]['HasResultSet']
+            # If status not available, keep previous details and retry on next wait cycle
+            if describe_result is None:
+                continue
 
-                if not run_config['silent']:
-                    logger.info(f'- {result[attempt]}')
+            result[attempt] = describe_result
 
-        all_status = [
-            attempt['Status']
-            for attempt in result.values()
-            if attempt is not None
-        ]
+            if result[attempt]['Status'] != prev_status:
+                if prev_status is not None:
+                    cnt_status[prev_status] -= 1
+                cnt_status[result[attempt]['Status']] += 1
 
-        cnt_status = {
-            status: all_status.count(status)
-            for status in set(all_status)
-        }
+            if result[attempt]['Status'] in terminal_statuses:
+                done.add(attempt)
+                n_done += 1
 
-        if cnt_status:
+            if not run_config['silent']:
+                logger.info(f'- {result[attempt]}')
+
+        if +cnt_status:
             logger.info(
-                f'- {", ".join(f"{k}: {v}" for k, v in cnt_status.items())}')
+                f'- {", ".join(f"{k}: {v}" for k, v in (+cnt_status).items())}')
 
-        if all(elem in [status_failed, status_finished] for elem in cnt_status.keys()):
+        if n_done == n_total:
             break
 
-        time.sleep(run_config['sleep_time'])
-        wait_cycle += 1
+        wait_cycle += poll_sleep(run_config, poll)
+        poll += 1
+
+    # Log each attempt, collected into a single record
+    attempt_msgs = []
 
-    # Log each attempt
     for attempt in result.keys():
 
         if result[attempt] is None:
-            break
+            continue
+
+        # If status was never retrieved, log timeout
+        if 'Status' not in result[attempt]:
+            attempt_msgs.append(f'- {attempt}, status unavailable, wait_cycles limit reached')
+            continue
 
         attempt_status = result[attempt]['Status']
         attempt_duration = result[attempt]['Duration']
@@ -618,18 +788,21 @@ def run_async_attempts(redshift_data_api_client, run_config, query):
 
         # If FAILED, log error
         if attempt_status == status_failed:
-            logger.info(f'{status_msg}, {result[attempt]["Error"]}')
+            attempt_msgs.append(f'{status_msg}, {result[attempt]["Error"]}')
 
         # If FINISHED, log success
         if attempt_status == status_finished:
             if attempt_has_result:
-                logger.info(f'{status_msg}, Has result')
+                attempt_msgs.append(f'{status_msg}, Has result')
             else:
-                logger.info(f'{status_msg}, No result')
+                attempt_msgs.append(f'{status_msg}, No result')
 
         # If wait_cycles reached, log timeout
-        if attempt_status not in [status_failed, status_finished] and wait_cycle >= run_config['wait_cycles']:
-            logger.info(f'{status_msg}, wait_cycles limit reached')
+        if attempt_status not in terminal_statuses and wait_cycle >= run_config['wait_cycles']:
+            attempt_msgs.append(f'{status_msg}, wait_cycles limit reached')
+
+    if attempt_msgs:
+        logger.info('\n' + '\n'.join(attempt_msgs))
 
     return result
 
@@ -671,10 +844,13 @@ def show_sample_records(redshift_data_api_client, attempts):
     Flow
     1. For first attempt with results
        - Get records
-       - Fit records into Pandas dataframe
+       - Fit first 3 records into Pandas dataframe
        - Show first 3 records
     '''
 
+    # Imported only when needed, pandas is slow to import
+    import pandas as pd
+
     if attempts:
 
         for v in attempts.values():
@@ -685,48 +861,41 @@ def show_sample_records(redshift_data_api_client, attempts):
                     Id=v['SubStatements'][-1]['Id'])
 
                 header_list = [col['name'] for col in recs['ColumnMetadata']]
-                record_list = []
+                sample_rows = recs['Records'][:show_recs]
 
-                for row in recs['Records']:
-                    row_data = [v for col in row for v in col.values()]
-                    record_list.append(row_data)
-
-                df = pd.DataFrame(record_list, columns=header_list)
+                # Each cell is a single {type: value} pair, build column by column
+                df = pd.DataFrame({
+                    col_index: [next(iter(row[col_index].values())) for row in sample_rows]
+                    for col_index in range(len(header_list))
+                })
+                df.columns = header_list
 
                 logger.info(f'\n{df.head(show_recs)}')
             break
 
 # %%
-def run_details_output(attempts_df, test_num, attempts):
+def run_details_output(csv_writer, test_num, attempts):
     '''
     Save substatements from data api describe_statement as CSV to capture Redshift Query ID
 
     Flow
     1. For each test
        - For each attempt
-         - Fit details into Pandas dataframe
-         - Save Pandas dataframe as CSV
+         - Write substatement details as CSV rows
     '''
 
     for attempt in attempts.keys():
 
         if attempts[attempt] is not None:
 
-            for subStatement in attempts[attempt]['SubStatements']:
+            for subStatement in attempts[attempt].get('SubStatements', []):
                 subStatement['QueryString'] = subStatement['QueryString'].replace(
                     '\n', ' ')
 
-            attempt_df = pd.DataFrame(attempts[attempt]['SubStatements'])
-
-            attempt_df.insert(loc=0, column='Attempt', value=attempt)
-            attempt_df.insert(loc=0, column='Test', value=test_num+1)
-
-            attempts_df = pd.concat([attempts_df, attempt_df])
-
-            attempts_df.to_csv(os.path.join(
-                csv_path, f'{now}.csv'), index=False, header=True)
-
-    return attempts_df
+            csv_writer.writerows(
+                [test_num+1, attempt] + [subStatement.get(col) for col in run_details_columns]
+                for subStatement in attempts[attempt].get('SubStatements', [])
+            )
 
 # %%
 def main():
@@ -745,41 +914,68 @@ def main():
 
             if read_queries_result is not None:
 
-                attempts_df = pd.DataFrame()
+                # Imported only after args, config and queries are valid, boto3 is slow to import
+                import boto3
+                import botocore.config
+
+                # Single client reused across tests, sized for concurrent polling
+                redshift_data_api_client = boto3.client(
+                    'redshift-data',
+                    config=botocore.config.Config(
+                        max_pool_connections=50,
+                        retries={'max_attempts': 10, 'mode': 'adaptive'}
+                    )
+                )
+
+                try:
+
+                    # Session setting queries are the same for every test
+                    session_setting_queries_result = session_setting_queries(
+                        read_config_result)
+
+                    # Run details CSV, appended to after each attempt
+                    # Thread pool to poll asynchronous attempts concurrently
+                    with open(os.path.join(csv_path, f'{now}.csv'), 'w', newline='') as csv_file, \
+                            concurrent.futures.ThreadPoolExecutor(
+                                max_workers=min(32, read_config_result['attempts'])) as executor:
+
+                        csv_writer = csv.writer(csv_file)
+                        csv_writer.writerow(['Test', 'Attempt'] + run_details_columns)
 
-                for test_num in range(len(read_queries_result)):
+                        for test_num in range(len(read_queries_result)):
 
-                    logger.info(f'Test {test_num+1}')
+                            logger.info(f'Test {test_num+1}')
 
-                    batch_test_queries_result = batch_test_queries(
-                        read_config_result, read_queries_result[test_num])
+                            batch_test_queries_result = batch_test_queries(
+                                session_setting_queries_result, read_queries_result[test_num])
 
-                    redshift_data_api_client = boto3.client('redshift-data')
+                            run_attempts_result = {}
 
-                    run_attempts_result = {}
+                            if read_config_result['synchronous']:
+                                run_attempts_result = run_sync_attempts(
+                                    redshift_data_api_client, read_config_result, batch_test_queries_result)
 
-                    if read_config_result['synchronous']:
-                        run_attempts_result = run_sync_attempts(
-                            redshift_data_api_client, read_config_result, batch_test_queries_result)
+                            if not read_config_result['synchronous']:
+                                run_attempts_result = run_async_attempts(
+                                    redshift_data_api_client, executor, read_config_result, batch_test_queries_result)
 
-                    if not read_config_result['synchronous']:
-                        run_attempts_result = run_async_attempts(
-                            redshift_data_api_client, read_config_result, batch_test_queries_result)
+                            success_run_attempts_result = {
+                                k: v
+                                for k, v in run_attempts_result.items()
+                                if v is not None and v.get('Status') == status_finished
+                            }
 
-                    success_run_attempts_result = {
-                        k: v
-                        for k, v in run_attempts_result.items()
-                        if v is not None and v['Status'] == status_finished
-                    }
+                            calculate_duration_stats(success_run_attempts_result)
 
-                    calculate_duration_stats(success_run_attempts_result)
+                            show_sample_records(
+                                redshift_data_api_client, success_run_attempts_result)
 
-                    show_sample_records(
-                        redshift_data_api_client, success_run_attempts_result)
+                            run_details_output(
+                                csv_writer, test_num, run_attempts_result)
 
-                    attempts_df = run_details_output(
-                        attempts_df, test_num, run_attempts_result)
+                            csv_file.flush()
 
+                finally:
                     redshift_data_api_client.close()
 
 